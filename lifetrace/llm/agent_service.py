@@ -1,26 +1,80 @@
 """Agent 服务，管理工具调用工作流"""
 
 import json
+import re
+import threading
 from collections.abc import Generator
+from concurrent.futures import wait
 from typing import Any
 
+from openai import BadRequestError
+
 # 导入工具模块以触发工具注册
 from lifetrace.llm import tools  # noqa: F401
+from lifetrace.llm.llm_cache import llm_response_cache
 from lifetrace.llm.llm_client import LLMClient
 from lifetrace.llm.tools.base import ToolResult
 from lifetrace.llm.tools.registry import ToolRegistry
+from lifetrace.util.daemon_pool import DaemonThreadPool
+from lifetrace.util.json_utils import JSON_OBJECT_RE, strip_json_fence
 from lifetrace.util.language import get_language_instruction
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 
 logger = get_logger()
 
+# 工具执行线程池：阻塞的工具调用（网络请求等）在守护线程中执行，并受工具超时时间约束；
+# 超时后放弃的调用不会阻塞进程退出
+_tool_executor = DaemonThreadPool(max_workers=8, thread_name_prefix="agent-tool")
+
+# 工具调用/工具结果消息的内容前缀，工具选择时需从上下文中排除
+TOOL_MESSAGE_PREFIXES = ("[工具调用:", "[工具结果]")
+
+# 任务评估完成关键词，编译为单个正则一次扫描
+COMPLETION_KEYWORDS = ("完成", "足够", "可以", "complete", "sufficient")
+_COMPLETION_KEYWORDS_RE = re.compile("|".join(map(re.escape, COMPLETION_KEYWORDS)))
+
+
+def _is_response_format_error(error: BadRequestError) -> bool:
+    """判断请求错误是否由 response_format 参数引起（即模型不支持 JSON 模式）"""
+    if error.param == "response_format":
+        return True
+    details = f"{error.code or ''} {error.message}".lower()
+    return "response_format" in details or "json_object" in details
+
+
+def _parse_json_response(text: str) -> dict[str, Any] | None:
+    """解析 LLM 返回的 JSON 对象，兼容 markdown 代码块和前后多余的文字
+
+    JSON 模式下响应本身就是合法 JSON（字符串值中可能包含 ```），先直接解析原文，
+    失败后再去除代码块，最后在原文中提取 JSON 对象。
+    """
+    for candidate in (text.strip(), strip_json_fence(text)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+
+    match = JSON_OBJECT_RE.search(text)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+
 
 class AgentService:
     """Agent 服务，管理工具调用工作流"""
 
     MAX_TOOL_CALLS = 5  # 最大工具调用次数
     MAX_ITERATIONS = 10  # 最大迭代次数
+    EVALUATION_MAX_TOKENS = 4  # 任务评估只需输出"完成"或"继续"
+    TOOL_RESULT_CONTEXT_LIMIT = 2000  # 写入对话历史的单个工具结果最大长度（字符）
+    TOOL_QUEUE_TIMEOUT = 30.0  # 工具调用在线程池中排队等待开始执行的最长时间（秒）
+
+    # 不支持 JSON 模式（response_format=json_object）的模型，进程内只探测一次
+    _json_mode_unsupported_models: set[str] = set()
 
     def __init__(self):
         """初始化 Agent 服务"""
@@ -47,6 +101,9 @@ class AgentService:
         tool_call_count = 0
         iteration_count = 0
         accumulated_context = []
+        used_tools: set[str] = set()
+        # 已执行过的工具调用（工具名 + 参数），用于发现重复决策
+        executed_calls: set[str] = set()
 
         # 构建初始消息
         messages = self._build_initial_messages(
@@ -72,26 +129,25 @@ class AgentService:
                 tool_name = tool_decision["tool_name"]
                 tool_params = tool_decision.get("tool_params", {})
 
-                # 构建工具调用标记，包含参数信息（特别是搜索关键词）
-                if tool_name == "web_search" and "query" in tool_params:
-                    # 对于 web_search，显示搜索关键词
-                    yield f"\n[使用工具: {tool_name} | 关键词: {tool_params['query']}]\n\n"
-                else:
-                    # 其他工具，显示工具名称和参数（如果有）
-                    params_str = ", ".join([f"{k}: {v}" for k, v in tool_params.items()])
-                    if params_str:
-                        yield f"\n[使用工具: {tool_name} | {params_str}]\n\n"
-                    else:
-                        yield f"\n[使用工具: {tool_name}]\n\n"
+                # 工具选择的决策消息不包含工具结果，重复的决策只会得到相同结果，直接生成回答
+                call_key = json.dumps([tool_name, tool_params], ensure_ascii=False, sort_keys=True)
+                if call_key in executed_calls:
+                    logger.info(f"[Agent] 工具调用与之前重复，停止调用工具: {tool_name}")
+                    break
+                executed_calls.add(call_key)
+
+                yield self._format_tool_call_marker(tool_name, tool_params)
 
                 tool_result = self._execute_tool(tool_name, tool_params)
                 tool_call_count += 1
+                used_tools.add(tool_name)
 
                 # 将工具结果添加到上下文
                 tool_context = self._format_tool_result(tool_name, tool_result)
                 accumulated_context.append(tool_context)
 
-                # 更新消息历史
+                # 更新消息历史（对话历史中只保留截断后的工具结果，控制后续每轮提示词长度；
+                # 完整结果保存在 accumulated_context 中，仅用于生成最终回答）
                 messages.append(
                     {
                         "role": "assistant",
@@ -101,16 +157,18 @@ class AgentService:
                 messages.append(
                     {
                         "role": "user",
-                        "content": f"[工具结果]\n{tool_context}",
+                        "content": (
+                            f"[工具结果]\n{tool_context[: self.TOOL_RESULT_CONTEXT_LIMIT]}"
+                        ),
                     }
                 )
 
-                # 步骤3: 任务评估
-                should_continue = self._evaluate_task_completion(
-                    user_query,
-                    messages,
-                    tool_result,
-                )
+                # 步骤3: 任务评估（已达到工具调用上限时无论结果如何都会结束，无需评估）
+                if tool_call_count >= self.MAX_TOOL_CALLS:
+                    logger.info("[Agent] 已达到最大工具调用次数，跳过任务评估")
+                    break
+
+                should_continue = self._evaluate_task_completion(messages, tool_result)
 
                 if not should_continue:
                     logger.info("[Agent] 任务评估：可以生成最终回答")
@@ -125,8 +183,21 @@ class AgentService:
             user_query,
             messages,
             accumulated_context,
+            used_tools,
         )
 
+    @staticmethod
+    def _format_tool_call_marker(tool_name: str, tool_params: dict[str, Any]) -> str:
+        """构建工具调用标记，包含参数信息（特别是搜索关键词）"""
+        if tool_name == "web_search" and "query" in tool_params:
+            # 对于 web_search，显示搜索关键词
+            return f"\n[使用工具: {tool_name} | 关键词: {tool_params['query']}]\n\n"
+        if not tool_params:
+            return f"\n[使用工具: {tool_name}]\n\n"
+        # 其他工具，显示工具名称和参数
+        params_str = ", ".join(f"{k}: {v}" for k, v in tool_params.items())
+        return f"\n[使用工具: {tool_name} | {params_str}]\n\n"
+
     def _build_initial_messages(
         self,
         user_query: str,
@@ -187,23 +258,25 @@ class AgentService:
             return {"use_tool": False, "tool_name": None, "tool_params": None}
 
         # 构建工具选择提示词
-        tools_schema = self.tool_registry.get_tools_schema()
+        # 系统提示词只包含静态内容（规则 + 工具 Schema），用户查询等动态内容位于其后的消息中，
+        # 保证各轮、各会话的请求前缀完全一致，便于命中服务端的前缀缓存
         tool_selection_prompt = get_prompt(
             "agent",
             "tool_selection",
-            tools=json.dumps(tools_schema, ensure_ascii=False, indent=2),
-            user_query=messages[-1]["content"] if messages else "",
+            tools=self.tool_registry.get_tools_schema_json(),
         )
 
         if not tool_selection_prompt:
             tool_selection_prompt = self._get_default_tool_selection_prompt(
-                tools_schema,
+                self.tool_registry.get_tools_schema(),
             )
 
         # 调用 LLM 进行工具选择
         try:
             decision_messages = self._build_tool_decision_messages(messages, tool_selection_prompt)
-            decision = self._call_llm_for_tool_selection(decision_messages)
+            decision = self._get_tool_selection_decision(
+                decision_messages, use_cache=tool_call_count == 0
+            )
 
             if decision:
                 use_tool = decision.get("use_tool", False)
@@ -228,49 +301,94 @@ class AgentService:
         self, messages: list[dict], tool_selection_prompt: str
     ) -> list[dict]:
         """构建工具选择决策消息，包含完整的上下文但排除工具相关消息"""
-        decision_messages = [{"role": "system", "content": tool_selection_prompt}]
-
-        # 添加所有非工具相关的消息（保留待办上下文和对话历史）
-        for msg in messages:
-            # 跳过系统提示词（使用新的工具选择提示词）
-            if msg.get("role") == "system":
-                continue
-            content = msg.get("content", "")
-            # 跳过工具调用和工具结果相关的消息
-            if content.startswith("[工具调用:") or content.startswith("[工具结果]"):
-                continue
-            # 保留待办上下文、对话历史和用户查询
-            decision_messages.append(msg)
-
-        return decision_messages
+        # 保留待办上下文、对话历史和用户查询；跳过系统提示词（使用新的工具选择提示词）
+        # 以及工具调用和工具结果相关的消息
+        return [
+            {"role": "system", "content": tool_selection_prompt},
+            *(
+                msg
+                for msg in messages
+                if msg.get("role") != "system"
+                and not msg.get("content", "").startswith(TOOL_MESSAGE_PREFIXES)
+            ),
+        ]
+
+    def _get_tool_selection_decision(
+        self, decision_messages: list[dict], use_cache: bool = True
+    ) -> dict[str, Any] | None:
+        """获取工具选择决策
+
+        重复提问时首轮决策消息完全相同，可以复用缓存的决策。决策消息不包含工具结果，
+        后续迭代命中缓存只会重放上一轮的决策，因此调用过工具后（use_cache=False）总是重新请求。
+        只缓存不涉及写操作的决策（见 _is_decision_cacheable）。
+        """
+        if not use_cache:
+            return self._call_llm_for_tool_selection(decision_messages)
 
-    def _call_llm_for_tool_selection(self, decision_messages: list[dict]) -> dict[str, Any] | None:
-        """调用 LLM 进行工具选择并解析响应"""
-        response = self.llm_client.client.chat.completions.create(
-            model=self.llm_client.model,
-            messages=decision_messages,
-            temperature=0.1,  # 低温度确保稳定决策
-            max_tokens=200,
+        cache_key = llm_response_cache.make_key(
+            self.llm_client.model, decision_messages, purpose="tool_selection"
         )
 
+        cached = llm_response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("[Agent] 命中工具选择决策缓存")
+            return cached
+
+        decision = self._call_llm_for_tool_selection(decision_messages)
+        # 解析失败的结果不缓存，下次重新请求
+        if decision is not None and self._is_decision_cacheable(decision):
+            llm_response_cache.set(cache_key, decision)
+        return decision
+
+    def _is_decision_cacheable(self, decision: dict[str, Any]) -> bool:
+        """判断工具选择决策是否可以缓存
+
+        不使用工具或选择只读工具的决策可以安全复用；会修改数据的工具（如创建、删除待办）
+        每次都需要重新决策，避免缓存命中时重复执行写操作。
+        """
+        if not decision.get("use_tool"):
+            return True
+        tool = self.tool_registry.get_tool(decision.get("tool_name") or "")
+        return tool is not None and tool.read_only
+
+    def _call_llm_for_tool_selection(self, decision_messages: list[dict]) -> dict[str, Any] | None:
+        """调用 LLM 进行工具选择并解析响应
+
+        优先使用 JSON 模式让服务端保证输出合法 JSON；模型不支持时回退到普通模式，
+        由 _parse_json_response 兼容 markdown 代码块等格式。
+        """
+        model = self.llm_client.model
+        request_params = {
+            "model": model,
+            "messages": decision_messages,
+            "temperature": 0.1,  # 低温度确保稳定决策
+            "max_tokens": 200,
+        }
+
+        if model in self._json_mode_unsupported_models:
+            response = self.llm_client.client.chat.completions.create(**request_params)
+        else:
+            try:
+                response = self.llm_client.client.chat.completions.create(
+                    **request_params,
+                    response_format={"type": "json_object"},
+                )
+            except BadRequestError as e:
+                if not _is_response_format_error(e):
+                    raise
+                logger.warning(f"[Agent] 模型 {model} 不支持 JSON 模式，回退到普通模式: {e}")
+                self._json_mode_unsupported_models.add(model)
+                response = self.llm_client.client.chat.completions.create(**request_params)
+
         decision_text = response.choices[0].message.content.strip()
 
         # 解析 JSON 响应
-        try:
-            # 清理可能的 markdown 代码块
-            clean_text = decision_text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            clean_text = clean_text.strip()
-
-            return json.loads(clean_text)
-        except json.JSONDecodeError:
+        decision = _parse_json_response(decision_text)
+        if decision is None:
             logger.warning(
                 f"[Agent] 工具选择响应解析失败: {decision_text}",
             )
-            return None
+        return decision
 
     def _execute_tool(self, tool_name: str, tool_params: dict) -> ToolResult:
         """执行工具"""
@@ -282,8 +400,41 @@ class AgentService:
                 error=f"工具 {tool_name} 不存在",
             )
 
-        try:
+        started = threading.Event()
+
+        def _run() -> ToolResult:
+            started.set()
             return tool.execute(**tool_params)
+
+        try:
+            future = _tool_executor.submit(_run)
+            # 工作线程全部被挂起的调用占用时，排队等待单独计时，不计入工具超时
+            if not started.wait(timeout=self.TOOL_QUEUE_TIMEOUT):
+                cancelled = future.cancel()
+                logger.error(
+                    f"[Agent] 工具 {tool_name} 排队 {self.TOOL_QUEUE_TIMEOUT} 秒仍未开始执行，"
+                    f"{'已取消' if cancelled else '调用已开始，将在后台线程中继续运行'}"
+                )
+                return ToolResult(
+                    success=False,
+                    content="",
+                    error=f"工具 {tool_name} 排队超时，工具线程池繁忙",
+                )
+
+            # 工具超时从开始执行时计算，工具内部抛出的 TimeoutError 按普通执行失败处理
+            done, _ = wait([future], timeout=tool.timeout)
+            if not done:
+                cancelled = future.cancel()
+                logger.error(
+                    f"[Agent] 工具 {tool_name} 执行超时（{tool.timeout} 秒），"
+                    f"{'已取消' if cancelled else '调用仍在后台线程中运行'}"
+                )
+                return ToolResult(
+                    success=False,
+                    content="",
+                    error=f"工具 {tool_name} 执行超时",
+                )
+            return future.result()
         except Exception as e:
             logger.error(f"[Agent] 工具执行失败: {e}")
             return ToolResult(
@@ -297,20 +448,20 @@ class AgentService:
         if not result.success:
             return f"工具 {tool_name} 执行失败: {result.error}"
 
-        formatted = f"工具 {tool_name} 执行结果：\n{result.content}"
+        parts = [f"工具 {tool_name} 执行结果：\n{result.content}"]
 
         # 如果有来源信息，添加到末尾
         if result.metadata and "sources" in result.metadata:
-            sources = result.metadata["sources"]
-            formatted += "\n\nSources:"
-            for idx, source in enumerate(sources, start=1):
-                formatted += f"\n{idx}. {source['title']} ({source['url']})"
+            parts.append("\n\nSources:")
+            parts.extend(
+                f"\n{idx}. {source['title']} ({source['url']})"
+                for idx, source in enumerate(result.metadata["sources"], start=1)
+            )
 
-        return formatted
+        return "".join(parts)
 
     def _evaluate_task_completion(
         self,
-        user_query: str,
         messages: list[dict],
         tool_result: ToolResult,
     ) -> bool:
@@ -325,40 +476,35 @@ class AgentService:
         if not tool_result.success:
             return True
 
-        # 使用 LLM 评估
-        evaluation_prompt = get_prompt(
-            "agent",
-            "task_evaluation",
-            user_query=user_query,
-            tool_result=tool_result.content[:500],  # 限制长度
-        )
-
+        # 使用 LLM 评估：将评估指令作为用户消息追加到当前对话末尾，
+        # 与对话历史共享前缀（系统提示词 + 历史 + 工具结果），便于命中服务端 KV/前缀缓存
+        evaluation_prompt = get_prompt("agent", "task_evaluation")
         if not evaluation_prompt:
             evaluation_prompt = self._get_default_evaluation_prompt()
 
-        try:
-            eval_messages = [
-                {"role": "system", "content": evaluation_prompt},
-                {
-                    "role": "user",
-                    "content": (f"用户查询: {user_query}\n\n工具结果: {tool_result.content[:500]}"),
-                },
-            ]
+        eval_messages = [*messages, {"role": "user", "content": evaluation_prompt}]
+        cache_key = llm_response_cache.make_key(
+            self.llm_client.model, eval_messages, purpose="task_evaluation"
+        )
+        cached_verdict = llm_response_cache.get(cache_key)
+        if cached_verdict is not None:
+            logger.info("[Agent] 命中任务评估缓存")
+            return cached_verdict
 
+        try:
             response = self.llm_client.client.chat.completions.create(
                 model=self.llm_client.model,
                 messages=eval_messages,
-                temperature=0.1,
-                max_tokens=100,
+                temperature=0.0,  # 分类任务，关闭采样
+                max_tokens=self.EVALUATION_MAX_TOKENS,
             )
 
             eval_text = response.choices[0].message.content.strip().lower()
 
             # 简单判断：如果包含"完成"、"足够"等关键词，认为可以生成回答
-            completion_keywords = ["完成", "足够", "可以", "complete", "sufficient"]
-            if any(keyword in eval_text for keyword in completion_keywords):
-                return False
-            return True
+            should_continue = _COMPLETION_KEYWORDS_RE.search(eval_text) is None
+            llm_response_cache.set(cache_key, should_continue)
+            return should_continue
         except Exception as e:
             logger.error(f"[Agent] 任务评估失败: {e}")
             # 默认继续
@@ -369,21 +515,21 @@ class AgentService:
         user_query: str,
         messages: list[dict],
         accumulated_context: list[str],
+        used_tools: set[str],
     ) -> Generator[str]:
         """生成最终回答"""
         # 构建包含所有工具结果的最终消息
         final_messages = messages.copy()
 
-        # 检查是否使用了 web_search 工具（通过检查消息历史）
-        used_web_search = any(
-            msg.get("content", "").startswith("[工具调用: web_search]") for msg in messages
-        )
+        # 检查是否使用了 web_search 工具（由工具循环记录，无需扫描消息历史）
+        used_web_search = "web_search" in used_tools
 
         if accumulated_context:
             # 如果有工具结果，构建强调工具结果的用户消息
             context_text = "\n\n".join(accumulated_context)
             logger.info(
-                f"[Agent] 生成最终回答，工具结果长度: {len(context_text)} 字符",
+                f"[Agent] 生成最终回答，工具结果长度: {len(context_text)} 字符，"
+                f"使用的工具: {sorted(used_tools)}",
             )
 
             # 构建用户消息
@@ -477,9 +623,9 @@ class AgentService:
 
     def _get_default_evaluation_prompt(self) -> str:
         """默认任务评估提示词"""
-        return """评估工具执行结果是否足够回答用户的问题。
+        return """请评估上述工具执行结果是否足够回答我的问题。
 
 如果工具结果已经包含足够信息来回答用户问题，返回"完成"。
 如果需要更多信息，返回"继续"。
 
-只返回"完成"或"继续"。"""
+只回复一个词："完成"或"继续"，不要输出其他内容。"""
@@ -3,10 +3,13 @@
 包含HDBSCAN聚类相关逻辑
 """
 
+from typing import TYPE_CHECKING
+
 from lifetrace.util.logging_config import get_logger
 
 from .event_summary_config import (
     HDBSCAN_AVAILABLE,
+    MAX_COMBINED_TEXT_LENGTH,
     MIN_CLUSTER_SIZE,
     MIN_TEXT_COUNT_FOR_CLUSTERING,
     SCIPY_AVAILABLE,
@@ -14,6 +17,9 @@ from .event_summary_config import (
     squareform,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
 logger = get_logger()
 
 
@@ -45,22 +51,39 @@ def check_clustering_prerequisites(ocr_texts: list[str], vector_service) -> tupl
     return True, ""
 
 
-def vectorize_texts(ocr_texts: list[str], vector_service) -> tuple[list[list[float]], list[str]]:
+def should_skip_clustering(unique_texts: list[str]) -> bool:
+    """判断去重后的文本是否无需聚类
+
+    文本很少，或合并后（含换行符）已能完整放入 LLM 输入长度上限时，
+    向量化和聚类都无法带来收益，直接使用去重后的文本即可。
+    """
+    if len(unique_texts) <= MIN_TEXT_COUNT_FOR_CLUSTERING * 2:
+        return True
+    return sum(map(len, unique_texts)) + len(unique_texts) <= MAX_COMBINED_TEXT_LENGTH
+
+
+def vectorize_texts(ocr_texts: list[str], vector_service) -> tuple["np.ndarray", list[str]]:
     """对OCR文本进行向量化
 
+    同一事件的OCR文本行重复率很高，相同文本只嵌入一次，并通过一次批量调用完成；
+    重复行复用同一向量（仍保留在结果中，不影响聚类密度）。
+
     Returns:
-        (向量列表, 有效文本列表)
+        (float32 向量矩阵, 有效文本列表)
     """
-    embeddings = []
-    valid_texts = []
-    for text in ocr_texts:
-        if not text or not text.strip():
-            continue
-        embedding = vector_service.vector_db.embed_text(text)
-        if embedding:
-            embeddings.append(embedding)
-            valid_texts.append(text)
-    return embeddings, valid_texts
+    import numpy as np
+
+    unique_texts = list(dict.fromkeys(text for text in ocr_texts if text and text.strip()))
+    unique_embeddings = vector_service.vector_db.embed_texts(unique_texts) if unique_texts else None
+    if unique_embeddings is None:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    row_of_text = {text: row for row, text in enumerate(unique_texts)}
+    valid_texts = [text for text in ocr_texts if text in row_of_text]
+    logger.debug(f"OCR文本向量化: {len(valid_texts)} 行, 实际嵌入 {len(unique_texts)} 条")
+
+    # 按原始顺序展开为连续的向量矩阵，直接用于距离计算
+    return unique_embeddings[[row_of_text[text] for text in valid_texts]], valid_texts
 
 
 def calculate_cluster_params(text_count: int) -> int:
@@ -86,27 +109,25 @@ def select_representative_texts(cluster_labels: list[int], valid_texts: list[str
     Returns:
         代表性文本列表
     """
-    representative_texts = []
-    unique_labels = set(cluster_labels)
+    # 单次遍历记录每个聚类中最长的文本（长度相同时保留最先出现的）
+    longest_by_label: dict[int, str] = {}
+    for label, text in zip(cluster_labels, valid_texts, strict=False):
+        current = longest_by_label.get(label)
+        if current is None or len(text) > len(current):
+            longest_by_label[label] = text
 
-    for label in unique_labels:
-        indices = [
-            idx for idx, cluster_label in enumerate(cluster_labels) if cluster_label == label
-        ]
-        if not indices:
-            continue
-
-        cluster_texts = [valid_texts[i] for i in indices]
-        longest_text = max(cluster_texts, key=len)
-        representative_texts.append(longest_text)
-
-    return representative_texts
+    return list(longest_by_label.values())
 
 
 def cluster_ocr_texts_with_hdbscan(ocr_texts: list[str], vector_service) -> list[str]:
     """
     使用HDBSCAN对向量化的OCR文本进行聚类，返回代表性文本
     """
+    unique_texts = list(dict.fromkeys(text for text in ocr_texts if text and text.strip()))
+    if should_skip_clustering(unique_texts):
+        logger.debug(f"去重后文本 {len(unique_texts)} 条，无需聚类")
+        return unique_texts
+
     can_cluster, error_msg = check_clustering_prerequisites(ocr_texts, vector_service)
     if not can_cluster:
         if error_msg and error_msg != "文本数量不足":
@@ -115,15 +136,13 @@ def cluster_ocr_texts_with_hdbscan(ocr_texts: list[str], vector_service) -> list
 
     try:
         import hdbscan
-        import numpy as np
 
-        embeddings, valid_texts = vectorize_texts(ocr_texts, vector_service)
+        embeddings_array, valid_texts = vectorize_texts(ocr_texts, vector_service)
 
-        if len(embeddings) < MIN_TEXT_COUNT_FOR_CLUSTERING:
+        if len(valid_texts) < MIN_TEXT_COUNT_FOR_CLUSTERING:
             logger.debug("有效文本数量不足，无法进行聚类")
             return valid_texts
 
-        embeddings_array = np.array(embeddings)
         min_cluster_size = calculate_cluster_params(len(valid_texts))
         logger.info(
             f"使用HDBSCAN聚类: {len(valid_texts)} 个文本, min_cluster_size={min_cluster_size}"
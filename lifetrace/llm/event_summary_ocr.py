@@ -90,27 +90,27 @@ def get_event_ocr_texts(event_id: int) -> tuple[list[str], dict[str, Any]]:
 
     try:
         with get_session() as session:
-            screenshots = session.query(Screenshot).filter(Screenshot.event_id == event_id).all()
-
-            for screenshot in screenshots:
-                ocr_results = (
-                    session.query(OCRResult).filter(OCRResult.screenshot_id == screenshot.id).all()
-                )
-
-                for ocr in ocr_results:
-                    if not ocr.text_content or not ocr.text_content.strip():
-                        continue
-
-                    ocr_block = ocr.text_content.strip()
-                    original_ocr_blocks.append(ocr_block)
-
-                    if ocr.confidence is not None and ocr.confidence < MIN_OCR_CONFIDENCE:
-                        debug_info["filtered_low_confidence_blocks"] += 1
-                        continue
-
-                    process_ocr_block(
-                        ocr_block, screenshot.id, ocr_lines, lines_with_meta, debug_info
-                    )
+            # 单次 JOIN 查询取出事件下所有截图的OCR结果，避免逐张截图查询（N+1）
+            rows = (
+                session.query(Screenshot.id, OCRResult.text_content, OCRResult.confidence)
+                .join(OCRResult, OCRResult.screenshot_id == Screenshot.id)
+                .filter(Screenshot.event_id == event_id)
+                .order_by(Screenshot.id, OCRResult.id)
+                .all()
+            )
+
+        for screenshot_id, text_content, confidence in rows:
+            if not text_content or not text_content.strip():
+                continue
+
+            ocr_block = text_content.strip()
+            original_ocr_blocks.append(ocr_block)
+
+            if confidence is not None and confidence < MIN_OCR_CONFIDENCE:
+                debug_info["filtered_low_confidence_blocks"] += 1
+                continue
+
+            process_ocr_block(ocr_block, screenshot_id, ocr_lines, lines_with_meta, debug_info)
 
         debug_info["original_ocr_blocks"] = original_ocr_blocks
         debug_info["original_ocr_blocks_count"] = len(original_ocr_blocks)
@@ -6,11 +6,14 @@
 import json
 import threading
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
 from lifetrace.llm.llm_client import LLMClient
 from lifetrace.storage import event_mgr, get_session
 from lifetrace.storage.models import Event
+from lifetrace.util.daemon_pool import DaemonThreadPool
+from lifetrace.util.json_utils import strip_json_fence
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 
@@ -27,6 +30,12 @@ from .event_summary_ocr import get_event_ocr_texts, separate_ui_candidates
 
 logger = get_logger()
 
+# 事件摘要后台线程池：复用固定数量的守护线程，避免每个事件创建新线程，也不会阻塞进程退出
+_summary_executor = DaemonThreadPool(max_workers=4, thread_name_prefix="event-summary")
+# 正在生成摘要的事件ID，避免同一事件被重复提交
+_inflight_event_ids: set[int] = set()
+_inflight_lock = threading.Lock()
+
 
 class EventSummaryService:
     """事件摘要生成服务"""
@@ -207,9 +216,19 @@ class EventSummaryService:
 
     def _prepare_ocr_text(self, ocr_texts: list[str]) -> str | None:
         """准备OCR文本，合并并限制长度"""
-        combined_text = "\n".join(ocr_texts)
-        if len(combined_text) > MAX_COMBINED_TEXT_LENGTH:
-            combined_text = combined_text[:MAX_COMBINED_TEXT_LENGTH] + "..."
+        # 边拼接边计数，达到长度上限即停止，避免先合并全部文本再截断
+        parts: list[str] = []
+        length = 0
+        for text in ocr_texts:
+            piece = f"\n{text}" if parts else text
+            remaining = MAX_COMBINED_TEXT_LENGTH - length
+            if len(piece) > remaining:
+                parts.append(piece[:remaining])
+                parts.append("...")
+                break
+            parts.append(piece)
+            length += len(piece)
+        combined_text = "".join(parts)
 
         if not combined_text or len(combined_text.strip()) < MIN_OCR_TEXT_LENGTH:
             return None
@@ -217,16 +236,7 @@ class EventSummaryService:
 
     def _extract_json_from_response(self, content: str) -> tuple[str, str]:
         """从LLM响应中提取JSON内容"""
-        original_content = content
-        if "```json" in content:
-            json_start = content.find("```json") + 7
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        elif "```" in content:
-            json_start = content.find("```") + 3
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        return content, original_content
+        return strip_json_fence(content), content
 
     def _parse_llm_response(self, content: str, original_content: str) -> dict[str, str] | None:
         """解析LLM响应为字典"""
@@ -322,38 +332,66 @@ class EventSummaryService:
         self, app_name: str | None, window_title: str | None
     ) -> dict[str, str]:
         """无OCR数据时的后备方案"""
-        app_name = app_name or "未知应用"
-        window_title = window_title or "未知窗口"
+        title, summary = _build_fallback_summary(app_name, window_title)
+        return {"title": title, "summary": summary}
 
-        app_display = app_name.replace(".exe", "").replace(".EXE", "")
 
-        title = f"{app_display}使用"
-        if len(title) > MAX_TITLE_LENGTH:
-            title = title[:MAX_TITLE_LENGTH]
+@lru_cache(maxsize=512)
+def _build_fallback_summary(app_name: str | None, window_title: str | None) -> tuple[str, str]:
+    """生成后备标题和摘要（同一应用/窗口的短事件很常见，结果按参数缓存）"""
+    app_name = app_name or "未知应用"
+    window_title = window_title or "未知窗口"
 
-        summary = f"在**{app_display}**中活动"
-        if window_title and window_title != "未知窗口":
-            summary = f"使用**{app_display}**: {window_title[:50]}"
+    app_display = app_name.removesuffix(".exe").removesuffix(".EXE")
 
-        return {"title": title, "summary": summary}
+    title = f"{app_display}使用"[:MAX_TITLE_LENGTH]
+
+    summary = f"在**{app_display}**中活动"
+    if window_title != "未知窗口":
+        summary = f"使用**{app_display}**: {window_title[:50]}"
 
+    return title, summary
 
-# 全局实例
-event_summary_service = EventSummaryService()
+
+_event_summary_service: EventSummaryService | None = None
+_event_summary_service_lock = threading.Lock()
+
+
+def get_event_summary_service() -> EventSummaryService:
+    """延迟加载事件摘要服务 - 首次访问时初始化（避免导入模块时即创建 LLM 客户端）"""
+    global _event_summary_service
+    if _event_summary_service is None:
+        with _event_summary_service_lock:
+            if _event_summary_service is None:
+                _event_summary_service = EventSummaryService()
+    return _event_summary_service
 
 
 def generate_event_summary_async(event_id: int):
-    """异步生成事件摘要（在单独线程中调用）
+    """异步生成事件摘要（提交到后台线程池执行）
 
     Args:
         event_id: 事件ID
     """
+    with _inflight_lock:
+        if event_id in _inflight_event_ids:
+            logger.debug(f"事件 {event_id} 的摘要正在生成中，跳过重复提交")
+            return
+        _inflight_event_ids.add(event_id)
 
     def _generate():
         try:
-            event_summary_service.generate_event_summary(event_id)
+            get_event_summary_service().generate_event_summary(event_id)
         except Exception as e:
             logger.error(f"异步生成事件摘要失败: {e}", exc_info=True)
-
-    thread = threading.Thread(target=_generate, daemon=True)
-    thread.start()
+        finally:
+            with _inflight_lock:
+                _inflight_event_ids.discard(event_id)
+
+    try:
+        _summary_executor.submit(_generate)
+    except RuntimeError:
+        # 线程池已在应用关闭时停止
+        with _inflight_lock:
+            _inflight_event_ids.discard(event_id)
+        logger.warning(f"事件摘要线程池已关闭，跳过事件 {event_id}")
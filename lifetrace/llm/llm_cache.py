@@ -0,0 +1,62 @@
+"""
+LLM 响应缓存模块
+为低温度（近似确定性）的 LLM 调用提供进程内精确匹配缓存
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+DEFAULT_MAX_SIZE = 512  # 缓存最大条目数
+DEFAULT_TTL_SECONDS = 600  # 缓存有效期（秒）
+
+
+class LLMResponseCache:
+    """线程安全的 LRU + TTL 缓存
+
+    键由模型名、消息列表和影响输出的调用参数共同决定，只有完全相同的请求才会命中。
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], **params: Any) -> str:
+        """根据模型、消息和调用参数生成缓存键"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """获取缓存值，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# 全局实例
+llm_response_cache = LLMResponseCache()
@@ -6,6 +6,7 @@ LLM 意图分类模块
 import json
 from typing import Any
 
+from lifetrace.util.json_utils import strip_leading_json_fence
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 from lifetrace.util.token_usage_logger import log_token_usage
@@ -80,12 +81,8 @@ def classify_intent_with_llm(client, model: str, user_query: str) -> dict[str, A
         logger.info(f"LLM意图分类 - 原始响应: {result_text}")
 
         try:
-            clean_text = result_text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            clean_text = clean_text.strip()
+            # 去除可能的 markdown 代码块标记
+            clean_text = strip_leading_json_fence(result_text)
 
             result = json.loads(clean_text)
             logger.info(
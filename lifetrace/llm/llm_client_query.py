@@ -6,6 +6,7 @@ import json
 from datetime import datetime
 from typing import Any
 
+from lifetrace.util.json_utils import strip_leading_json_fence
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 from lifetrace.util.token_usage_logger import log_token_usage
@@ -62,12 +63,8 @@ def parse_query_with_llm(client, model: str, user_query: str) -> dict[str, Any]:
         logger.info(f"LLM查询解析 - 原始响应: {result_text}")
 
         try:
-            clean_text = result_text.strip()
-            if clean_text.startswith("```json"):
-                clean_text = clean_text[7:]
-            if clean_text.endswith("```"):
-                clean_text = clean_text[:-3]
-            clean_text = clean_text.strip()
+            # 去除可能的 markdown 代码块标记
+            clean_text = strip_leading_json_fence(result_text)
             result = json.loads(clean_text)
             return result
         except json.JSONDecodeError:
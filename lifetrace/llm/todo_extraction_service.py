@@ -3,12 +3,12 @@
 """
 
 import json
-import re
 from datetime import datetime
 from typing import Any
 
 from lifetrace.llm.llm_client import LLMClient
 from lifetrace.storage import event_mgr
+from lifetrace.util.json_utils import JSON_OBJECT_RE
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 from lifetrace.util.time_parser import calculate_scheduled_time
@@ -270,7 +270,7 @@ class TodoExtractionService:
         """
         try:
             # 尝试提取JSON
-            json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
+            json_match = JSON_OBJECT_RE.search(response_text)
             if json_match:
                 json_str = json_match.group(0)
                 result = json.loads(json_str)
@@ -2,10 +2,17 @@
 
 from lifetrace.llm.tools.base import Tool, ToolResult
 from lifetrace.llm.tools.registry import ToolRegistry
-from lifetrace.llm.tools.web_search_tool import WebSearchTool
 
-# 初始化工具注册表并注册工具
+
+def _create_web_search_tool() -> Tool:
+    """创建联网搜索工具（延迟导入，避免导入工具模块时即初始化搜索客户端）"""
+    from lifetrace.llm.tools.web_search_tool import WebSearchTool
+
+    return WebSearchTool()
+
+
+# 初始化工具注册表并注册工具（首次使用时才实例化）
 tool_registry = ToolRegistry()
-tool_registry.register(WebSearchTool())
+tool_registry.register_factory("web_search", _create_web_search_tool)
 
 __all__ = ["Tool", "ToolResult", "ToolRegistry", "tool_registry"]
@@ -18,6 +18,9 @@ class ToolResult:
 class Tool(ABC):
     """工具基类"""
 
+    timeout: float = 60.0  # 执行超时时间（秒）
+    read_only: bool = False  # 是否为只读（信息查询类）工具，只有只读工具的选择决策允许缓存
+
     @property
     @abstractmethod
     def name(self) -> str:
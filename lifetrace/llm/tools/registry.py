@@ -1,5 +1,9 @@
 """工具注册表"""
 
+import json
+import threading
+from collections.abc import Callable
+
 from lifetrace.llm.tools.base import Tool
 from lifetrace.util.logging_config import get_logger
 
@@ -11,6 +15,11 @@ class ToolRegistry:
 
     _instance = None
     _tools: dict[str, Tool] = {}
+    # 延迟注册的工具工厂：工具名称 -> 创建工具实例的函数，首次使用时才实例化
+    _factories: dict[str, Callable[[], Tool]] = {}
+    _factories_lock = threading.Lock()
+    # 工具 Schema JSON 缓存：可用工具名称元组 -> 序列化结果
+    _schema_json_cache: dict[tuple[str, ...], str] = {}
 
     def __new__(cls):
         if cls._instance is None:
@@ -20,14 +29,45 @@ class ToolRegistry:
     def register(self, tool: Tool):
         """注册工具"""
         self._tools[tool.name] = tool
+        self._schema_json_cache.clear()
         logger.info(f"注册工具: {tool.name}")
 
+    def register_factory(self, name: str, factory: Callable[[], Tool]):
+        """延迟注册工具：只记录工厂函数，首次获取工具时才导入并实例化
+
+        避免导入工具模块时就初始化各工具的依赖（如第三方 API 客户端）。
+        """
+        self._factories[name] = factory
+        self._schema_json_cache.clear()
+        logger.info(f"注册工具工厂: {name}")
+
+    def _instantiate_pending_tools(self):
+        """实例化所有尚未创建的延迟注册工具
+
+        先注册工具再移除工厂，保证并发调用方在工厂被移除前总能看到已注册的工具；
+        创建失败的工厂会保留，以便后续调用重试。
+        """
+        if not self._factories:
+            return
+        with self._factories_lock:
+            for name, factory in list(self._factories.items()):
+                if name not in self._tools:
+                    try:
+                        self.register(factory())
+                    except Exception as e:
+                        logger.error(f"创建工具失败: {name}, 错误: {e}")
+                        continue
+                del self._factories[name]
+
     def get_tool(self, name: str) -> Tool | None:
         """获取工具"""
+        if name not in self._tools:
+            self._instantiate_pending_tools()
         return self._tools.get(name)
 
     def get_available_tools(self) -> list[Tool]:
         """获取所有可用工具"""
+        self._instantiate_pending_tools()
         return [tool for tool in self._tools.values() if tool.is_available()]
 
     def get_tools_schema(self) -> list[dict]:
@@ -40,3 +80,20 @@ class ToolRegistry:
             }
             for tool in self.get_available_tools()
         ]
+
+    def get_tools_schema_json(self) -> str:
+        """获取所有可用工具 Schema 的 JSON 字符串（用于 LLM 提示词）
+
+        工具 Schema 在注册后不会变化，按当前可用工具集合缓存序列化结果，
+        使用紧凑格式以减少提示词 token。
+        """
+        cache_key = tuple(tool.name for tool in self.get_available_tools())
+        schema_json = self._schema_json_cache.get(cache_key)
+        if schema_json is None:
+            schema_json = json.dumps(
+                self.get_tools_schema(),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._schema_json_cache[cache_key] = schema_json
+        return schema_json
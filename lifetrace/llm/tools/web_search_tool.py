@@ -10,6 +10,8 @@ logger = get_logger()
 class WebSearchTool(Tool):
     """联网搜索工具"""
 
+    read_only = True
+
     def __init__(self):
         """初始化联网搜索工具"""
         self.tavily_client = TavilyClientWrapper()
@@ -132,6 +132,27 @@ class VectorDatabase:
             self.logger.error(f"Failed to embed text: {e}")
             return []
 
+    def embed_texts(self, texts: list[str]) -> "np.ndarray | None":
+        """批量将文本转换为向量嵌入（一次模型调用）
+
+        Args:
+            texts: 非空输入文本列表
+
+        Returns:
+            形状为 (len(texts), dim) 的 float32 矩阵，失败时返回 None
+        """
+        if not self.embedding_model:
+            raise RuntimeError("Embedding model not available (multimodal mode)")
+
+        try:
+            embeddings = self.embedding_model.encode(
+                [text.strip() for text in texts], normalize_embeddings=True
+            )
+            return np.asarray(embeddings, dtype=np.float32)
+        except Exception as e:
+            self.logger.error(f"Failed to embed texts: {e}")
+            return None
+
     def add_document(self, doc_id: str, text: str, metadata: dict[str, Any] | None = None) -> bool:
         """添加文档到向量数据库
 
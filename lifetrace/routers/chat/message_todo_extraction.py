@@ -1,7 +1,6 @@
 """从消息中提取待办的路由"""
 
 import json
-import re
 
 from lifetrace.llm.llm_client import LLMClient
 from lifetrace.routers.chat.base import router
@@ -10,6 +9,7 @@ from lifetrace.schemas.message_todo_extraction import (
     MessageTodoExtractionRequest,
     MessageTodoExtractionResponse,
 )
+from lifetrace.util.json_utils import JSON_OBJECT_RE
 from lifetrace.util.logging_config import get_logger
 from lifetrace.util.prompt_loader import get_prompt
 
@@ -100,7 +100,7 @@ def _parse_llm_response(response_text: str) -> list[ExtractedMessageTodo]:
     """
     try:
         # 尝试提取JSON
-        json_match = re.search(r"\{.*\}", response_text, re.DOTALL)
+        json_match = JSON_OBJECT_RE.search(response_text)
         if json_match:
             json_str = json_match.group(0)
             result = json.loads(json_str)
@@ -28,6 +28,7 @@ from lifetrace.routers import (
 )
 from lifetrace.routers import config as config_router
 from lifetrace.services.config_service import is_llm_configured
+from lifetrace.util.daemon_pool import shutdown_daemon_pools
 from lifetrace.util.logging_config import get_logger, setup_logging
 from lifetrace.util.path_utils import get_user_logs_dir
 from lifetrace.util.settings import settings
@@ -66,6 +67,9 @@ async def lifespan(app: FastAPI):
     if job_manager:
         job_manager.stop_all()
 
+    # 关闭后台线程池，丢弃排队中的任务
+    shutdown_daemon_pools()
+
 
 app = FastAPI(
     title="LifeTrace API",
@@ -139,9 +139,9 @@ class EventService:
             raise HTTPException(status_code=404, detail="事件不存在")
 
         # 延迟导入避免循环依赖
-        from lifetrace.llm.event_summary_service import event_summary_service
+        from lifetrace.llm.event_summary_service import get_event_summary_service
 
-        success = event_summary_service.generate_event_summary(event_id)
+        success = get_event_summary_service().generate_event_summary(event_id)
 
         if success:
             updated_event = self.event_repo.get_summary(event_id)
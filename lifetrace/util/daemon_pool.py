@@ -0,0 +1,94 @@
+"""
+守护线程池
+固定数量的守护工作线程 + 任务队列。与 ThreadPoolExecutor 不同，工作线程不会在解释器退出时被 join，
+仍在执行的任务（如长时间阻塞的 LLM/网络调用）不会阻塞进程退出。
+"""
+
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+from lifetrace.util.logging_config import get_logger
+
+logger = get_logger()
+
+# 已创建的线程池，应用关闭时统一停止
+_pools: list["DaemonThreadPool"] = []
+_pools_lock = threading.Lock()
+
+
+class DaemonThreadPool:
+    """由守护线程执行任务的线程池，工作线程在首次提交任务时才创建"""
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: queue.SimpleQueue[tuple[Future, Callable, tuple, dict] | None] = (
+            queue.SimpleQueue()
+        )
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        with _pools_lock:
+            _pools.append(self)
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """提交任务，返回 Future；线程池已关闭时抛出 RuntimeError"""
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(f"线程池 {self.thread_name_prefix} 已关闭")
+            if not self._threads:
+                self._start_workers()
+            future: Future = Future()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self):
+        """停止接收新任务并取消排队中的任务，不等待正在执行的任务"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+            for _ in self._threads:
+                self._queue.put(None)
+
+    def _start_workers(self):
+        for i in range(self.max_workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"{self.thread_name_prefix}_{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+def shutdown_daemon_pools():
+    """关闭所有守护线程池（应用关闭时调用）"""
+    with _pools_lock:
+        pools = list(_pools)
+    for pool in pools:
+        pool.shutdown()
+    logger.info(f"已关闭 {len(pools)} 个后台线程池")
@@ -0,0 +1,25 @@
+"""LLM 响应 JSON 处理工具"""
+
+import re
+
+# 匹配 LLM 响应中的 markdown 代码块（```json ... ``` 或 ``` ... ```，缺少结束标记时取到末尾）
+JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|$)", re.DOTALL | re.IGNORECASE)
+
+# 匹配以 markdown 代码块开头的 LLM 响应（```json ... ```），不会截断字符串值中出现的 ```
+LEADING_JSON_FENCE_RE = re.compile(
+    r"^\s*(?:```(?:json)?)?\s*(.*?)\s*(?:```)?\s*$", re.DOTALL | re.IGNORECASE
+)
+
+# 响应中第一个 { 到最后一个 } 之间的内容（用于从带有多余说明文字的响应中提取 JSON 对象）
+JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def strip_json_fence(text: str) -> str:
+    """去除 LLM 响应中包裹 JSON 的 markdown 代码块，没有代码块时返回去除首尾空白的原文"""
+    match = JSON_FENCE_RE.search(text)
+    return match.group(1) if match else text.strip()
+
+
+def strip_leading_json_fence(text: str) -> str:
+    """去除包裹整个 LLM 响应的 markdown 代码块，只处理响应开头/结尾的围栏"""
+    return LEADING_JSON_FENCE_RE.match(text).group(1)